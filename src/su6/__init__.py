@@ -6,15 +6,40 @@ This file exposes 'app' to the module.
 #
 # SPDX-License-Identifier: MIT
 
-from rich import print
+import typing
 
-from .cli import app
-from .core import GREEN_CIRCLE, RED_CIRCLE, YELLOW_CIRCLE, ExitCodes, print_json, state
+from .core import (
+    GREEN_CIRCLE,
+    RED_CIRCLE,
+    YELLOW_CIRCLE,
+    ExitCodes,
+    print,
+    print_json,
+    state,
+)
 
 # for plugins:
 from .plugins import register as register_plugin
 from .plugins import run_tool
 
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from .cli import app
+
+
+def __getattr__(name: str) -> typing.Any:
+    """
+    Import the cli (and with it, every installed plugin) only when 'app' is actually used.
+
+    Plugins do `from su6 import register_plugin`, which should not have to load the whole cli.
+    """
+    if name == "app":
+        from .cli import app
+
+        return app
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 __all__ = [
     "app",
     "print",
@@ -0,0 +1,146 @@
+"""
+Remembers which tools succeeded on which version of the code, so `su6` can skip checks on unchanged files.
+
+Files are compared by mtime and size (not by content), since reading every file is exactly the cost we try to avoid.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import typing
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = ".su6_cache"
+CACHE_FILE = "results.json"
+
+# directories that never contain code to check (and may change without the code changing):
+SKIP_DIRS = ("__pycache__", "node_modules", "htmlcov")
+# reports written by `su6 pytest`, possibly while the other checks of `su6 all` are still running
+# (pytest-cov's data file is '.coverage', or '.coverage.<suffix>' in parallel mode):
+SKIP_FILES = ("coverage.json", "coverage.xml", ".coverage")
+
+# config files (next to pyproject.toml) that change the outcome of the cacheable tools:
+TOOL_CONFIG_FILES = (
+    "ruff.toml",
+    ".ruff.toml",
+    "setup.cfg",
+    "tox.ini",
+    ".isort.cfg",
+    ".editorconfig",
+    ".pydocstyle",
+    ".pydocstyle.ini",
+    ".pydocstylerc",
+    ".pydocstylerc.ini",
+    ".bandit",
+)
+
+# {tool + args: fingerprint of the paths at the time of the last successful run}
+T_Cache: typing.TypeAlias = dict[str, str]
+
+_lock = threading.Lock()
+
+
+def _skip_dir(name: str) -> bool:
+    """
+    Hidden directories (.git, .mypy_cache, .su6_cache, ...), virtualenvs and .bak's are never relevant.
+    """
+    return name.startswith(".") or name.startswith("venv") or name.endswith(".bak") or name in SKIP_DIRS
+
+
+def _skip_file(name: str) -> bool:
+    """
+    Coverage reports change on every pytest run, without the code changing.
+    """
+    return name in SKIP_FILES or name.startswith(".coverage.")
+
+
+def _walk(path: str, skip: typing.Collection[str]) -> typing.Generator[os.DirEntry[str], None, None]:
+    """
+    Recursively yield all files in 'path', using os.scandir since that gives us stat info for free.
+
+    Entries with an absolute path in 'skip' are left out.
+    """
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if skip and os.path.abspath(entry.path) in skip:
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                if not _skip_dir(entry.name):
+                    yield from _walk(entry.path, skip)
+            elif entry.is_file() and not _skip_file(entry.name):
+                yield entry
+
+
+def fingerprint(paths: typing.Iterable[str], skip: typing.Iterable[str] = ()) -> str:
+    """
+    Build a hash of the mtime and size of every file in 'paths' (files or directories).
+
+    Paths that don't exist (e.g. cli flags) are ignored.
+    Files or directories in 'skip' (e.g. the cache dir itself) are ignored when walking a directory.
+    """
+    skip = {os.path.abspath(path) for path in skip}
+    stats: list[tuple[str, int, int]] = []
+    for path in paths:
+        if os.path.isdir(path):
+            stats.extend((entry.path, entry.stat().st_mtime_ns, entry.stat().st_size) for entry in _walk(path, skip))
+        elif os.path.isfile(path):
+            stat = os.stat(path)
+            stats.append((path, stat.st_mtime_ns, stat.st_size))
+
+    return hashlib.blake2b(repr(sorted(stats)).encode(), digest_size=16).hexdigest()
+
+
+def cache_key(tool: str, args: typing.Iterable[str]) -> str:
+    """
+    Identify a tool run by its arguments and executable (so upgrading the tool invalidates the cache).
+    """
+    executable = shutil.which(tool) or tool
+    return " ".join([executable, fingerprint([executable]), *args])
+
+
+def load_cache(cache_dir: str | Path) -> T_Cache:
+    """
+    Load the results of previous runs. A missing or corrupt cache file is treated as an empty cache.
+    """
+    try:
+        with (Path(cache_dir) / CACHE_FILE).open() as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    return data if isinstance(data, dict) else {}
+
+
+def save_cache(cache_dir: str | Path, data: T_Cache) -> None:
+    """
+    Atomically write the cache file (write to a temporary file, then rename it).
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    tmp_file = cache_dir / f"{CACHE_FILE}.{os.getpid()}.{threading.get_ident()}"
+    with tmp_file.open("w") as f:
+        json.dump(data, f)
+
+    os.replace(tmp_file, cache_dir / CACHE_FILE)
+
+
+def is_unchanged(cache_dir: str | Path, key: str, current: str) -> bool:
+    """
+    Did the last successful run with 'key' see exactly the same files?
+    """
+    return load_cache(cache_dir).get(key) == current
+
+
+def remember_success(cache_dir: str | Path, key: str, current: str) -> None:
+    """
+    Store the fingerprint of a successful run.
+
+    Multiple tools may finish at the same time (see `run_in_parallel`), so the read-modify-write is locked.
+    """
+    with _lock:
+        data = load_cache(cache_dir)
+        data[key] = current
+        save_cache(cache_dir, data)
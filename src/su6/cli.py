@@ -1,19 +1,16 @@
 """This file contains all Typer Commands."""
 
-import contextlib
-import math
+import functools
 import os
 import sys
 import typing
 from dataclasses import asdict
-from importlib.metadata import entry_points
-from json import load as json_load
+from pathlib import Path
 
 import typer
 from configuraptor import Singleton
 from plumbum import local
 from plumbum.machines import LocalCommand
-from rich import print
 from typing_extensions import Never
 
 from .__about__ import __version__
@@ -28,17 +25,24 @@ from .core import (
     Format,
     PlumbumError,
     Verbosity,
+    changed_python_files,
+    clear_tool_caches,
     dump_tools_with_results,
     info,
     is_installed,
+    json_loads,
     log_command,
+    on_tool_success,
+    print,
     print_json,
+    run_in_parallel,
     run_tool,
+    run_until_first_failure,
     state,
     warn,
     with_exit_code,
 )
-from .plugins import include_plugins
+from .plugins import discover_plugins, include_plugins
 
 app = typer.Typer()
 
@@ -47,63 +51,119 @@ include_plugins(app)
 # 'directory' is an optional cli argument to many commands, so we define the type here for reuse:
 T_directory: typing.TypeAlias = typing.Annotated[str, typer.Argument()]
 
+# passed to black's --exclude (or --force-exclude); black compiles it in its own process:
+BLACK_EXCLUDE = r"venv.+|.+\.bak"
+
+
+def _changed_paths(directory: str) -> list[str]:
+    """
+    For --changed: the new or modified python files in 'directory', or 'directory' itself if git can't tell.
+    """
+    files = changed_python_files(directory)
+    if files is None:
+        if state.verbosity > 2:
+            warn("Could not determine changed files via git, checking everything.")
+        return [directory]
+
+    return files
+
 
 @app.command()
 @with_exit_code()
-def ruff(directory: T_directory = None) -> int:
+def ruff(directory: T_directory = None, changed: bool = False) -> int:
     """
     Runs the Ruff Linter.
 
     Args:
         directory: where to run ruff on (default is current dir)
+        changed: only check files that are new or modified according to git.
 
     """
     config = state.update_config(directory=directory)
 
-    return run_tool("ruff", "check", config.directory)
+    if not changed:
+        return run_tool("ruff", "check", config.directory, cacheable=True)
+
+    if not (paths := _changed_paths(config.directory)):
+        return on_tool_success("ruff", "")
+
+    # explicitly passed files are only excluded with --force-exclude:
+    return run_tool("ruff", "check", "--force-exclude", *paths, cacheable=True)
 
 
 @app.command()
 @with_exit_code()
-def black(directory: T_directory = None, fix: bool = False) -> int:
+def black(directory: T_directory = None, fix: bool = False, changed: bool = False) -> int:
     """
     Runs the Black code formatter.
 
     Args:
         directory: where to run black on (default is current dir)
         fix: if --fix is passed, black will be used to reformat the file(s).
+        changed: only check files that are new or modified according to git.
 
     """
     config = state.update_config(directory=directory)
 
-    args = [config.directory, r"--exclude=venv.+|.+\.bak"]
+    paths = _changed_paths(config.directory) if changed else [config.directory]
+    if not paths:
+        return on_tool_success("black", "")
+
+    if config.use_ruff_unified:
+        # ruff's formatter is black-compatible and saves starting a python interpreter:
+        args = ["format", *paths] if fix else ["format", "--check", *paths]
+        if changed:
+            args.append("--force-exclude")
+        # the default-flags for black are meant for black itself, ruff would reject them:
+        return run_tool("ruff", *args, cacheable=True, name="black", flags_for="")
+
+    # explicitly passed files are only excluded with --force-exclude:
+    exclude = "--force-exclude" if changed else "--exclude"
+    args = [*paths, f"{exclude}={BLACK_EXCLUDE}"]
     if not fix:
         args.append("--check")
     elif state.verbosity > 2:
         info("note: running WITHOUT --check -> changing files")
 
-    return run_tool("black", *args)
+    return run_tool("black", *args, cacheable=True)
 
 
 @app.command()
 @with_exit_code()
-def isort(directory: T_directory = None, fix: bool = False) -> int:
+def isort(directory: T_directory = None, fix: bool = False, changed: bool = False) -> int:
     """
     Runs the import sort (isort) utility.
 
     Args:
         directory: where to run isort on (default is current dir)
         fix: if --fix is passed, isort will be used to rearrange imports.
+        changed: only check files that are new or modified according to git.
 
     """
     config = state.update_config(directory=directory)
-    args = [config.directory]
+
+    paths = _changed_paths(config.directory) if changed else [config.directory]
+    if not paths:
+        return on_tool_success("isort", "")
+
+    if config.use_ruff_unified:
+        # ruff's 'I' rules implement isort:
+        args = ["check", "--select", "I", "--fix" if fix else "--no-fix", *paths]
+        if changed:
+            args.append("--force-exclude")
+        # the default-flags for isort are meant for isort itself, ruff would reject them:
+        return run_tool("ruff", *args, cacheable=True, name="isort", flags_for="")
+
+    args = list(paths)
+    if changed:
+        # explicitly passed files are only skipped with --filter-files:
+        args.append("--filter-files")
     if not fix:
         args.append("--check-only")
     elif state.verbosity > 2:
         info("note: running WITHOUT --check -> changing files")
 
-    return run_tool("isort", *args)
+    return run_tool("isort", *args, cacheable=True)
 
 
 @app.command()
@@ -118,7 +178,18 @@ def mypy(directory: T_directory = None) -> int:
     """
     config = state.update_config(directory=directory)
 
-    return run_tool("mypy", config.directory)
+    args = [config.directory]
+    if cache_dir := config.get_tool_cache_dir("mypy"):
+        # keep mypy's incremental cache with the other su6 caches
+        args.append(f"--cache-dir={cache_dir}")
+
+    # neither is cacheable: mypy follows imports outside of 'directory' (e.g. into installed packages and stubs)
+    if config.use_dmypy and is_installed("dmypy", python_fallback=False):
+        # the daemon keeps running (and stays warm) in the background, so next runs only recheck changed files:
+        status_file = ["--status-file", os.path.join(cache_dir, "dmypy.json")] if cache_dir else []
+        return run_tool("dmypy", *status_file, "run", "--", *args, name="mypy")
+
+    return run_tool("mypy", *args)
 
 
 @app.command()
@@ -132,7 +203,7 @@ def bandit(directory: T_directory = None) -> int:
 
     """
     config = state.update_config(directory=directory)
-    return run_tool("bandit", "-r", "-c", config.pyproject, config.directory)
+    return run_tool("bandit", "-r", "-c", config.pyproject, config.directory, cacheable=True)
 
 
 @app.command()
@@ -152,7 +223,7 @@ def pydocstyle(directory: T_directory = None, convention: str = None) -> int:
     if config.docstyle_convention:
         args.extend(["--convention", config.docstyle_convention])
 
-    return run_tool("pydocstyle", *args)
+    return run_tool("pydocstyle", *args, cacheable=True)
 
 
 @app.command(name="list")
@@ -162,16 +233,18 @@ def list_tools() -> None:
     List tools that would run with 'su6 all'.
     """
     config = state.update_config()
-    all_tools = [ruff, black, mypy, bandit, isort, pydocstyle, pytest]
+    all_tools = ALL_TOOLS
     all_plugin_tools = [_.wrapped for _ in state._registered_plugins.values() if _.what == "command"]
-    tools_to_run = config.determine_which_to_run(all_tools) + config.determine_plugins_to_run("add_to_all")
+    # set for O(1) membership checks below:
+    tools_to_run = set(config.determine_which_to_run(all_tools) + config.determine_plugins_to_run("add_to_all"))
 
     output = {}
-    for tool in all_tools + all_plugin_tools:
+    for tool in [*all_tools, *all_plugin_tools]:
         tool_name = tool.__name__.replace("_", "-")
+        will_run = tool in tools_to_run
 
         if state.output_format == "text":
-            if tool not in tools_to_run:
+            if not will_run:
                 print(RED_CIRCLE, tool_name)
             elif not is_installed(tool_name):  # pragma: no cover
                 print(YELLOW_CIRCLE, tool_name)
@@ -180,12 +253,28 @@ def list_tools() -> None:
                 print(GREEN_CIRCLE, tool_name)
 
         elif state.output_format == "json":
-            output[tool_name] = tool in tools_to_run
+            output[tool_name] = will_run
 
     if state.output_format == "json":
         print_json(output)
 
 
+# `_ignore` for `all` and `fix`, depending on --ignore-uninstalled (shared, so no set is built per call):
+IGNORE_UNINSTALLED: frozenset[int] = frozenset({ExitCodes.command_not_found})
+IGNORE_NOTHING: frozenset[int] = frozenset()
+
+# used by `all` with stop-after-first-failure (plugins are in stage 1):
+TOOL_STAGES = {
+    "ruff": 0,
+    "black": 0,
+    "isort": 0,
+    "pydocstyle": 0,
+    "mypy": 1,
+    "bandit": 1,
+    "pytest": 2,
+}
+
+
 @app.command(name="all")
 @with_exit_code()
 def check_all(
@@ -220,27 +309,22 @@ def check_all(
         badge=badge,
     )
 
-    ignored_exit_codes = set()
-    if ignore_uninstalled:
-        ignored_exit_codes.add(ExitCodes.command_not_found)
+    ignored_exit_codes = IGNORE_UNINSTALLED if ignore_uninstalled else IGNORE_NOTHING
 
-    tools = [ruff, black, mypy, bandit, isort, pydocstyle, pytest]
+    tools = config.determine_which_to_run(ALL_TOOLS, exclude) + config.determine_plugins_to_run("add_to_all", exclude)
 
-    tools = config.determine_which_to_run(tools, exclude) + config.determine_plugins_to_run("add_to_all", exclude)
+    # functools.partial copies its kwargs, so the same dict can be shared by every call:
+    kw: dict[str, typing.Any] = {"_suppress": True, "_ignore": ignored_exit_codes}
+    pytest_kw = {**kw, "coverage": config.coverage, "badge": config.badge}
 
-    exit_codes = []
-    for tool in tools:
-        a = [directory]
-        kw = dict(_suppress=True, _ignore=ignored_exit_codes)
+    calls = [functools.partial(tool, directory, **(pytest_kw if tool is pytest else kw)) for tool in tools]
 
-        if tool is pytest:  # pragma: no cover
-            kw["coverage"] = config.coverage
-            kw["badge"] = config.badge
-
-        result = tool(*a, **kw)
-        exit_codes.append(result)
-        if config.stop_after_first_failure and result != 0:
-            break
+    if config.stop_after_first_failure:
+        # fast tools first; slower stages only start when everything before it passed:
+        stages = [TOOL_STAGES.get(tool.__name__, 1) for tool in tools]
+        exit_codes = run_until_first_failure(calls, stages)
+    else:
+        exit_codes = run_in_parallel(calls)
 
     if state.output_format == "json":
         dump_tools_with_results(tools, exit_codes)
@@ -294,6 +378,9 @@ def pytest(
 
     args = ["--cov", config.directory]
 
+    if cache_dir := config.get_tool_cache_dir("pytest"):
+        args.extend(["-o", f"cache_dir={cache_dir}"])
+
     if config.coverage is not None:
         # json output required!
         json = True
@@ -327,9 +414,10 @@ def pytest(
     exit_code = run_tool("pytest", *args)
 
     if config.coverage is not None:
-        with open("coverage.json") as f:
-            data = json_load(f)
-            percent_covered = math.floor(data["totals"]["percent_covered"])
+        with open("coverage.json", "rb") as f:
+            data = json_loads(f.read())
+            # percentages are never negative, so int() rounds down just like math.floor:
+            percent_covered = int(data["totals"]["percent_covered"])
 
         # if actual coverage is less than the the threshold, exit code should be success (0)
         exit_code = percent_covered < config.coverage
@@ -342,41 +430,73 @@ def pytest(
                 # it's still True for some reason?
                 config.badge = DEFAULT_BADGE
 
-            with contextlib.suppress(FileNotFoundError):
-                os.remove(config.badge)
-
-            result = local["genbadge"]("coverage", "-i", "coverage.xml", "-o", config.badge)
-            if state.verbosity > 2:
-                info(result)
+            _write_coverage_badge(config.badge)
 
     return exit_code
 
 
+# every built-in checker, in the default order of 'all' (defined here since all of them exist by now):
+ALL_TOOLS = (ruff, black, mypy, bandit, isort, pydocstyle, pytest)
+
+
+def _write_coverage_badge(badge: str) -> None:
+    """
+    Generate an svg badge from coverage.xml, in-process if genbadge is importable (instead of via its cli).
+
+    The badge is replaced atomically, so there is never a moment without (or with a half-written) badge.
+    """
+    try:
+        from genbadge.utils_coverage import get_coverage_badge, get_coverage_stats
+    except ImportError:  # pragma: no cover
+        # '-o -' writes the svg to stdout
+        svg = local["genbadge"]("coverage", "-i", "coverage.xml", "-o", "-")
+    else:
+        svg = get_coverage_badge(get_coverage_stats("coverage.xml")).as_svg()
+
+    badge_path = Path(badge)
+    badge_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = badge_path.with_name(f"{badge_path.name}.tmp")
+    tmp_path.write_text(svg)
+    os.replace(tmp_path, badge_path)
+
+    if state.verbosity > 2:
+        info(f"Coverage badge created: {badge!r}")
+
+
 @app.command(name="fix")
 @with_exit_code()
-def do_fix(directory: T_directory = None, ignore_uninstalled: bool = False, exclude: list[str] = None) -> bool:
+def do_fix(
+    directory: T_directory = None,
+    ignore_uninstalled: bool = False,
+    stop_after_first_failure: bool = None,
+    exclude: list[str] = None,
+) -> bool:
     """
     Do everything that's safe to fix (not ruff because that may break semantics).
 
     Args:
         directory: where to run the tools on (default is current dir)
         ignore_uninstalled: use --ignore-uninstalled to skip exit code 127 (command not found)
+        stop_after_first_failure: skip the remaining fixers after the first one fails (like with `all`).
         exclude: choose extra services (in addition to config) to skip for this run.
 
 
     `def fix()` is not recommended because other commands have 'fix' as an argument so those names would collide.
     """
-    config = state.update_config(directory=directory)
+    config = state.update_config(directory=directory, stop_after_first_failure=stop_after_first_failure)
 
-    ignored_exit_codes = set()
-    if ignore_uninstalled:
-        ignored_exit_codes.add(ExitCodes.command_not_found)
+    ignored_exit_codes = IGNORE_UNINSTALLED if ignore_uninstalled else IGNORE_NOTHING
 
     tools = [isort, black]
 
     tools = config.determine_which_to_run(tools, exclude) + config.determine_plugins_to_run("add_to_fix", exclude)
 
-    exit_codes = [tool(directory, fix=True, _suppress=True, _ignore=ignored_exit_codes) for tool in tools]
+    # fixers modify the same files, so they always run one by one (not in parallel like `all`):
+    exit_codes = []
+    for tool in tools:
+        exit_codes.append(result := tool(directory, fix=True, _suppress=True, _ignore=ignored_exit_codes))
+        if result and config.stop_after_first_failure:
+            break
 
     if state.output_format == "json":
         dump_tools_with_results(tools, exit_codes)
@@ -391,7 +511,7 @@ def plugins() -> None:  # pragma: nocover
     List installed plugin modules.
 
     """
-    modules = entry_points(group="su6")
+    modules = discover_plugins()
     match state.output_format:
         case "text":
             if modules:
@@ -490,6 +610,8 @@ def main(
     config: str = None,
     verbosity: Verbosity = DEFAULT_VERBOSITY,
     output_format: typing.Annotated[Format, typer.Option("--format")] = DEFAULT_FORMAT,
+    cache: bool = None,
+    cache_dir: str = None,
     # stops the program:
     show_config: bool = False,
     version: bool = False,
@@ -502,6 +624,8 @@ def main(
         config: path to a different config toml file
         verbosity: level of detail to print out (1 - 3)
         output_format: output format
+        cache: skip checks on files that didn't change since their last successful run? (overwrites config toml)
+        cache_dir: where to store the cache (default: .su6_cache)
 
         show_config: display current configuration?
         version: display current version?
@@ -512,7 +636,14 @@ def main(
         # we don't clear everything since Plugin configs may be already cached.
         Singleton.clear(state.config)
 
-    state.load_config(config_file=config, verbosity=verbosity, output_format=output_format)
+    clear_tool_caches()
+    state.load_config(
+        config_file=config,
+        verbosity=verbosity,
+        output_format=output_format,
+        cache=cache,
+        cache_dir=cache_dir,
+    )
 
     if show_config:
         show_config_callback()
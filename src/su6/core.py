@@ -2,28 +2,50 @@
 This file contains internal helpers used by cli.py.
 """
 
+import contextlib
+import contextvars
+import copy
 import enum
 import functools
+import importlib.util
 import inspect
 import json
 import operator
-import pydoc
+import os
+import shlex
+import shutil
+import subprocess  # nosec B404
 import sys
 import types
 import typing
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Callable, Optional, TypeAlias, Union
 
 import configuraptor
 import plumbum.commands.processes as pb
-import tomli
+import rich
 import typer
 from configuraptor import convert_config
 from configuraptor.helpers import find_pyproject_toml
-from plumbum import local
 from plumbum.machines import LocalCommand
-from rich import print
+from rich.text import Text
+
+from . import cache
+
+if sys.version_info >= (3, 11):
+    import tomllib
+else:  # pragma: no cover
+    import tomli as tomllib
+
+try:
+    # orjson parses large files (e.g. coverage.json) a lot faster, but it's optional (`pip install su6[orjson]`):
+    import orjson
+
+    json_loads = orjson.loads
+except ImportError:  # pragma: no cover
+    json_loads = json.loads  # type: ignore
 
 if typing.TYPE_CHECKING:  # pragma: no cover
     from .plugins import AnyRegistration
@@ -61,6 +83,111 @@ T_Inner_Wrapper: TypeAlias = Callable[..., int | None]
 # so that gets called() with args and kwargs when that method is used from the cli
 T_Outer_Wrapper: TypeAlias = Callable[[T_Command], T_Inner_Wrapper]
 
+T = typing.TypeVar("T")
+
+# (args, kwargs) of print calls that are held back while a tool runs in a worker thread:
+T_Print_Buffer: TypeAlias = list[tuple[tuple[Any, ...], dict[str, Any]]]
+_print_buffer: contextvars.ContextVar[Optional[T_Print_Buffer]] = contextvars.ContextVar("_print_buffer", default=None)
+
+
+def print(*args: Any, **kwargs: Any) -> None:  # noqa: A001
+    """
+    'rich.print', but buffered when called from a tool that runs via `run_in_parallel`.
+    """
+    if (buffer := _print_buffer.get()) is not None:
+        buffer.append((args, kwargs))
+    else:
+        rich.print(*args, **kwargs)
+
+
+def _run_buffered(call: Callable[[], T]) -> tuple[T, T_Print_Buffer]:
+    """
+    Run 'call' (in a worker thread) and collect everything it tries to print.
+    """
+    buffer: T_Print_Buffer = []
+    _print_buffer.set(buffer)
+    return call(), buffer
+
+
+def _flush(printed: T_Print_Buffer) -> None:
+    """
+    Actually print the output that was buffered by `_run_buffered`.
+    """
+    for args, kwargs in printed:
+        rich.print(*args, **kwargs)
+
+
+def _iter_in_parallel(
+    calls: typing.Sequence[Callable[[], T]],
+) -> typing.Generator[tuple[T, T_Print_Buffer], None, None]:
+    """
+    Start all calls in a thread pool and yield their (result, buffered output) in the original order.
+    """
+    if not calls:
+        return
+
+    if len(calls) == 1:
+        # e.g. a stage with only pytest: no need to start a thread (the output is still buffered, in a fresh context)
+        yield contextvars.copy_context().run(_run_buffered, calls[0])
+        return
+
+    executor = ThreadPoolExecutor(max_workers=min(len(calls), os.cpu_count() or 1))
+    try:
+        # every call gets its own copy of the context, so it can have its own print buffer:
+        futures = [executor.submit(contextvars.copy_context().run, _run_buffered, call) for call in calls]
+        for future in futures:
+            yield future.result()
+    finally:
+        # if the caller stops early (e.g. after the first failure), calls that didn't start yet are cancelled:
+        executor.shutdown(cancel_futures=True)
+
+
+def run_in_parallel(calls: typing.Sequence[Callable[[], T]]) -> list[T]:
+    """
+    Run independent calls (e.g. the tools in `su6 all`) concurrently and return their results in order.
+
+    The tools spend almost all their time waiting on a subprocess, so threads are enough to overlap them.
+    Output of each call is buffered and flushed in the original order, so the traffic lights stay deterministic.
+    """
+    results = []
+    for result, printed in _iter_in_parallel(calls):
+        _flush(printed)
+        results.append(result)
+
+    return results
+
+
+def run_until_first_failure(calls: typing.Sequence[Callable[[], T]], stages: typing.Sequence[int]) -> list[T]:
+    """
+    Same outcome as running 'calls' one by one until one fails (truthy result), but with stages running in parallel.
+
+    Calls with the same stage (e.g. 0 for fast linters, 1 for mypy and bandit, 2 for pytest) run concurrently;
+    a stage only starts if no failure was found yet. Calls after the first failure (in the original order)
+    may still have run within a stage, but their results and output are dropped.
+
+    Args:
+        calls: the calls (e.g. tools) in the order they should be reported
+        stages: for each call, the stage it belongs to
+    """
+    finished: dict[int, tuple[T, T_Print_Buffer]] = {}
+    results: list[T] = []
+
+    for stage in sorted(set(stages)):
+        indices = [idx for idx, call_stage in enumerate(stages) if call_stage == stage]
+        # closing the generator (also when returning early) shuts down its pool, which cancels calls not started yet:
+        with contextlib.closing(_iter_in_parallel([calls[idx] for idx in indices])) as outcomes:
+            for idx, outcome in zip(indices, outcomes):
+                finished[idx] = outcome
+                # report everything that is known in order; stop at the first failure:
+                while len(results) in finished:
+                    result, printed = finished[len(results)]
+                    _flush(printed)
+                    results.append(result)
+                    if result:
+                        return results
+
+    return results
+
 
 def print_json(data: Any) -> None:
     """
@@ -86,6 +213,10 @@ def dump_tools_with_results(tools: list[T_Command], results: list[int | bool | N
     print_json({tool.__name__: not result for tool, result in zip(tools, results)})
 
 
+# default for `_ignore`, shared so no new set has to be created on every command call:
+_EMPTY_IGNORE: frozenset[int] = frozenset()
+
+
 def with_exit_code() -> T_Outer_Wrapper:
     """
     Convert the return value of an app.command (bool or int) to an typer Exit with return code, \
@@ -101,10 +232,10 @@ def with_exit_code() -> T_Outer_Wrapper:
 
     def outer_wrapper(func: T_Command) -> T_Inner_Wrapper:
         @functools.wraps(func)
-        def inner_wrapper(*args: Any, **kwargs: Any) -> int:
-            _suppress = kwargs.pop("_suppress", False)
-            _ignore_exit_codes = kwargs.pop("_ignore", set())
-
+        def inner_wrapper(
+            *args: Any, _suppress: bool = False, _ignore: typing.Collection[int] = _EMPTY_IGNORE, **kwargs: Any
+        ) -> int:
+            # _suppress and _ignore are keyword-only, so python itself separates them from the command's kwargs.
             result = func(*args, **kwargs)
             if state.output_format == "json" and not _suppress and result is not None and not isinstance(result, bool):
                 # isinstance(True, int) -> True so not isinstance(result, bool)
@@ -120,7 +251,7 @@ def with_exit_code() -> T_Outer_Wrapper:
             if (retcode := int(result)) and not _suppress:
                 raise typer.Exit(code=retcode)
 
-            if retcode in _ignore_exit_codes:  # pragma: no cover
+            if retcode in _ignore:  # pragma: no cover
                 # there is an error code, but we choose to ignore it -> return 0
                 return ExitCodes.success
 
@@ -135,24 +266,28 @@ def is_available_via_python(tool: str) -> bool:
     """
     Sometimes, an executable is not available in PATH (e.g. via pipx) but it is available as `python -m something`.
 
-    This tries to test for that.
+    This tries to test for that, by asking the import system whether the module can be found (without importing it).
         May not work for exceptions like 'semantic-release'/'semantic_release' (python-semantic-release)
     """
     try:
-        pydoc.render_doc(tool)
-        return True
-    except ImportError:
+        return importlib.util.find_spec(tool) is not None
+    except (ImportError, ValueError):
+        # e.g. 'package.module' where 'package' does not exist, or an empty/relative name
         return False
 
 
+@functools.lru_cache(maxsize=256)
 def is_installed(tool: str, python_fallback: bool = True) -> bool:
     """
     Check whether a certain tool is installed (/ can be found via 'which').
+
+    The result is cached, since `su6 list` and `su6 all` may ask for the same tool multiple times.
     """
-    try:
-        return bool(local["which"](tool))
-    except pb.ProcessExecutionError:
-        return is_available_via_python(tool) if python_fallback else False
+    if _which(tool):
+        # same lookup as run_tool, so PATH is scanned only once per tool (and no `which` process is started):
+        return True
+
+    return is_available_via_python(tool) if python_fallback else False
 
 
 def on_tool_success(tool_name: str, result: str) -> int:
@@ -197,12 +332,12 @@ def run_tool_via_python(tool_name: str, *args: str) -> int:
     """
     Fallback: try `python -m tool ...` instead of `tool ...`.
     """
-    cmd = local[sys.executable]["-m", tool_name]
+    argv = ["-m", tool_name, *args]
     if state.verbosity >= 3:
-        log_command(cmd, args)
+        log_command(sys.executable, argv)
 
     try:
-        result = cmd(*args)
+        result = _spawn(sys.executable, argv)
         return on_tool_success(tool_name, result)
     except pb.ProcessExecutionError as e:
         if "No module named" in e.stderr:
@@ -211,31 +346,134 @@ def run_tool_via_python(tool_name: str, *args: str) -> int:
         return on_tool_failure(tool_name, e)
 
 
-def run_tool(tool: str, *_args: str) -> int:
+# {tool: absolute path or None if it can't be found}
+_SPAWN_CACHE: dict[str, Optional[str]] = {}
+
+
+def _which(tool: str) -> Optional[str]:
+    """
+    Resolve 'tool' to an absolute path (or None), only scanning PATH once per tool.
+    """
+    if tool not in _SPAWN_CACHE:
+        _SPAWN_CACHE[tool] = shutil.which(tool)
+    return _SPAWN_CACHE[tool]
+
+
+def _spawn(executable: str, args: typing.Sequence[str], capture: bool = True) -> str:
+    """
+    Run 'executable' (absolute path) with 'args' and return its stdout, similar to plumbum's `local[tool](*args)`.
+
+    The process is started with an absolute path, no cwd/preexec_fn and close_fds=False,
+    which allows `subprocess` to use `os.posix_spawn` instead of copying this whole process with fork().
+    No file descriptors leak into the tool, since Python creates them as non-inheritable (PEP 446).
+
+    If 'capture' is False, the output is sent to /dev/null instead of being read (and decoded) by su6,
+    for when it would not be shown anyway. stdout (and stderr on failure) will then be empty strings.
+
+    Raises:
+        pb.ProcessExecutionError: on a non-zero exit code, so the output can be handled just like with plumbum.
+    """
+    argv = [executable, *args]
+    output = subprocess.PIPE if capture else subprocess.DEVNULL
+    process = subprocess.run(  # nosec B603
+        argv,
+        stdin=subprocess.DEVNULL,
+        stdout=output,
+        stderr=output,
+        close_fds=False,
+        encoding="utf-8",
+        errors="replace",
+    )
+    stdout, stderr = process.stdout or "", process.stderr or ""
+    if process.returncode:
+        raise pb.ProcessExecutionError(argv, process.returncode, stdout, stderr)
+
+    return stdout
+
+
+def clear_tool_caches() -> None:
+    """
+    Forget where tools were found, e.g. when `main` (re)loads the config.
+    """
+    _SPAWN_CACHE.clear()
+    is_installed.cache_clear()
+
+
+def changed_python_files(directory: str) -> Optional[list[str]]:
+    """
+    List the python files in 'directory' that are new or modified according to git (None if git can't tell).
+
+    Used by `--changed`, so tools only have to look at the files you're actually working on.
+    """
+    if not (git := _which("git")):  # pragma: no cover
+        return None
+
+    try:
+        # --relative: paths relative to (and only within) the current directory, like the tools expect;
+        # --diff-filter=d: everything except deletions (so also renamed or copied files, under their new name)
+        modified = _spawn(git, ["diff", "--name-only", "--relative", "--diff-filter=d", "HEAD", "--", directory])
+        untracked = _spawn(git, ["ls-files", "--others", "--exclude-standard", "--", directory])
+    except pb.ProcessExecutionError:
+        # e.g. not a git repository
+        return None
+
+    return sorted({file for file in (modified + untracked).splitlines() if file.endswith(".py")})
+
+
+def run_tool(tool: str, *_args: str, cacheable: bool = False, name: str = None, flags_for: str = None) -> int:
     """
     Abstraction to run one of the cli checking tools and process its output.
 
     Args:
         tool: the (bash) name of the tool to run.
         _args: cli args to pass to the cli bash tool
+        cacheable: if `cache` is enabled, skip the tool when it succeeded before and the files in _args didn't change.
+                   Only use this for tools of which the result depends on nothing but those files
+                   (+ pyproject.toml and the other config files in cache.TOOL_CONFIG_FILES).
+        name: show the result under a different name than 'tool', e.g. when the 'black' check is done by `ruff format`.
+        flags_for: which [tool.su6.default-flags] entry to add (default: 'name' or 'tool').
+                   Pass an empty string to add none, e.g. because black's flags don't work for `ruff format`.
     """
-    tool_name = tool.split("/")[-1]
+    tool_name = name or tool.split("/")[-1]
 
     args = list(_args)
 
-    if state.config and (extra_flags := state.config.get_default_flags(tool)):
+    if flags_for is None:
+        flags_for = name or tool
+
+    if state.config and flags_for and (extra_flags := state.config.get_default_flags(flags_for)):
         args.extend(extra_flags)
 
-    try:
-        cmd = local[tool]
-    except pb.CommandNotFound:  # pragma: no cover
+    cached = None
+    if cacheable and state.config and state.config.cache:
+        # fingerprint BEFORE running, so changes made by the tool itself (e.g. --fix) invalidate the cache:
+        # su6's own output (the cache and the coverage badge) may change while the tool runs, so it's not included:
+        own_output = [state.config.get_cache_dir()]
+        if isinstance(state.config.badge, str):
+            own_output.append(state.config.badge)
+
+        # tool config files are looked up next to pyproject.toml (which may be in a parent of the cwd):
+        project_dir = Path(state.config.pyproject).parent
+        tool_configs = [str(project_dir / config_file) for config_file in cache.TOOL_CONFIG_FILES]
+
+        fingerprint = cache.fingerprint([*args, state.config.pyproject, *tool_configs], skip=own_output)
+        cached = (state.config.get_cache_dir(), cache.cache_key(tool, args), fingerprint)
+        if cache.is_unchanged(*cached):
+            if state.verbosity > 2:
+                info(f"{tool_name}: no changes since the last successful run, skipping.")
+            return on_tool_success(tool_name, "")
+
+    if not (executable := _which(tool)):  # pragma: no cover
         return run_tool_via_python(tool_name, *args)
 
     if state.verbosity >= 3:
-        log_command(cmd, args)
+        log_command(executable, args)
 
     try:
-        result = cmd(*args)
+        # with --verbosity 1, neither success nor failure output is shown, so don't bother reading it:
+        result = _spawn(executable, args, capture=state.verbosity > 1)
+        if cached:
+            cache.remember_success(*cached)
         return on_tool_success(tool_name, result)
 
     except pb.ProcessExecutionError as e:
@@ -253,6 +491,12 @@ class Verbosity(enum.Enum):
     verbose = "3"
     debug = "4"  # only for internal use
 
+    def __init__(self, value: str) -> None:
+        """
+        Store the level as int once, so comparisons don't have to parse the string value.
+        """
+        self._level = int(value)
+
     @staticmethod
     def _compare(
         self: "Verbosity",
@@ -269,13 +513,13 @@ class Verbosity(enum.Enum):
             other: the second Verbosity (or other thing to compare)
             _operator: a callable operator (from 'operators') that takes two of the same types as input.
         """
-        match other:
-            case Verbosity():
-                return _operator(self.value, other.value)
-            case int():
-                return _operator(int(self.value), other)
-            case str():
-                return _operator(int(self.value), int(other))
+        # compare as ints (instead of matching on the type of 'other'):
+        if isinstance(other, Verbosity):
+            return _operator(self._level, other._level)
+        if isinstance(other, (int, str)):
+            return _operator(self._level, int(other))
+        # e.g. None or a float: let Python decide (which raises a TypeError for <, <=, >= and >)
+        return NotImplemented
 
     def __gt__(self, other: "Verbosity_Comparable") -> bool:
         """
@@ -387,6 +631,10 @@ class Config(AbstractConfig):
     json_indent: int = 4
     docstyle_convention: Optional[str] = None
     default_flags: typing.Optional[dict[str, str | list[str]]] = field(default=None)
+    cache: bool = False  # skip checks on unchanged files
+    cache_dir: Optional[str] = None  # defaults to .su6_cache
+    use_ruff_unified: bool = False  # do the 'black' and 'isort' checks with ruff
+    use_dmypy: bool = False  # do the 'mypy' check via the (persistent) mypy daemon
 
     ### pytest ###
     coverage: Optional[float] = None  # only relevant for pytest
@@ -401,21 +649,24 @@ class Config(AbstractConfig):
             # no cover because pytest can't test pytest :C
             self.badge = DEFAULT_BADGE
 
-    def determine_which_to_run(self, options: list[C], exclude: list[str] = None) -> list[C]:
+    def determine_which_to_run(self, options: typing.Sequence[C], exclude: list[str] = None) -> list[C]:
         """
         Filter out any includes/excludes from pyproject.toml (first check include, then exclude).
 
         `exclude` via cli overwrites config option.
         """
         if self.include:
-            tools = [_ for _ in options if _.__name__ in self.include and _.__name__ not in (exclude or [])]
-            tools.sort(key=lambda f: self.include.index(f.__name__))
+            cli_exclude = set(exclude or ())
+            # {name: position}, for O(1) lookups of both 'is it included' and 'where should it go':
+            order = {name: idx for idx, name in enumerate(dict.fromkeys(self.include))}
+            tools = [_ for _ in options if _.__name__ in order and _.__name__ not in cli_exclude]
+            tools.sort(key=lambda f: order[f.__name__])
             return tools
         elif self.exclude or exclude:
-            to_exclude = set((self.exclude or []) + (exclude or []))
+            to_exclude = {*(self.exclude or ()), *(exclude or ())}
             return [_ for _ in options if _.__name__ not in to_exclude]
         else:
-            return options
+            return list(options)
 
     def determine_plugins_to_run(self, attr: str, exclude: list[str] = None) -> list[T_Command]:
         """
@@ -429,6 +680,26 @@ class Config(AbstractConfig):
             _.wrapped for name, _ in state._registered_plugins.items() if getattr(_, attr) and name not in to_exclude
         ]
 
+    def get_cache_dir(self) -> str:
+        """
+        Directory to store the su6 cache in (if `cache` is enabled).
+        """
+        return self.cache_dir or cache.DEFAULT_CACHE_DIR
+
+    def get_tool_cache_dir(self, tool: str) -> Optional[str]:
+        """
+        If `cache-dir` is configured, tools with their own cache (mypy, pytest) store it in a subdirectory there.
+
+        This makes it easy to persist all caches at once (e.g. between CI runs).
+        Returns None (= tool default) if no `cache-dir` is configured.
+        """
+        if not self.cache_dir:
+            return None
+
+        path = Path(self.cache_dir) / tool
+        path.mkdir(parents=True, exist_ok=True)
+        return str(path)
+
     def set_raw(self, raw: dict[str, Any]) -> None:
         """
         Set the raw config dict (from pyproject.toml).
@@ -471,6 +742,25 @@ MaybeConfig: TypeAlias = Optional[Config]
 T_typelike: TypeAlias = type | types.UnionType | types.UnionType
 
 
+@functools.lru_cache(maxsize=16)
+def _parse_toml(toml_path: str, mtime_ns: int, size: int) -> dict[str, Any]:  # noqa: ARG001
+    """
+    Parse a toml file; mtime and size are only part of the cache key, so an edited file is parsed again.
+    """
+    with open(toml_path, "rb") as f:
+        return tomllib.load(f)
+
+
+def load_toml(toml_path: str | Path) -> dict[str, Any]:
+    """
+    Load a toml file, parsing it only once as long as it doesn't change (e.g. when the config is reloaded).
+
+    A copy is returned, so the cached data can't be modified by the caller.
+    """
+    stat = os.stat(toml_path)
+    return copy.deepcopy(_parse_toml(str(toml_path), stat.st_mtime_ns, stat.st_size))
+
+
 def _get_su6_config(overwrites: dict[str, Any], toml_path: Optional[str | Path] = None) -> MaybeConfig:
     """
     Parse the users pyproject.toml (found using black's logic) and extract the tool.su6 part.
@@ -489,8 +779,7 @@ def _get_su6_config(overwrites: dict[str, Any], toml_path: Optional[str | Path]
     if not toml_path:
         return None
 
-    with open(toml_path, "rb") as f:
-        full_config = tomli.load(f)
+    full_config = load_toml(toml_path)
 
     tool_config = full_config["tool"]
 
@@ -514,8 +803,8 @@ def get_su6_config(verbosity: Verbosity = DEFAULT_VERBOSITY, toml_path: str = No
         overwrites (dict[str, Any): cli arguments can overwrite the config toml.
                 If a value is None, the key is not overwritten.
     """
-    # strip out any 'overwrites' with None as value
-    overwrites = convert_config(overwrites)
+    # strip out any 'overwrites' with None as value (nothing to convert for a plain `state.load_config()`)
+    overwrites = convert_config(overwrites) if overwrites else {}
 
     try:
         if config := _get_su6_config(overwrites, toml_path=toml_path):
@@ -532,32 +821,45 @@ def get_su6_config(verbosity: Verbosity = DEFAULT_VERBOSITY, toml_path: str = No
         return Config(**overwrites)
 
 
+def _print_styled(style: str, args: tuple[str, ...]) -> None:
+    """
+    Print 'args' to stderr in a color, shared by info/warn/danger.
+
+    The text is not parsed as rich markup: that's faster, and tool output often contains [brackets]
+    (e.g. mypy's '[attr-defined]') which would otherwise be swallowed as unknown style tags.
+    """
+    print(Text(" ".join(args), style=style), file=sys.stderr)
+
+
 def info(*args: str) -> None:
     """
     'print' but with blue text.
     """
-    print(f"[blue]{' '.join(args)}[/blue]", file=sys.stderr)
+    _print_styled("blue", args)
 
 
 def warn(*args: str) -> None:
     """
     'print' but with yellow text.
     """
-    print(f"[yellow]{' '.join(args)}[/yellow]", file=sys.stderr)
+    _print_styled("yellow", args)
 
 
 def danger(*args: str) -> None:
     """
     'print' but with red text.
     """
-    print(f"[red]{' '.join(args)}[/red]", file=sys.stderr)
+    _print_styled("red", args)
 
 
-def log_command(command: LocalCommand, args: typing.Iterable[str]) -> None:
+def log_command(command: LocalCommand | str, args: typing.Iterable[str]) -> None:
     """
-    Print a Plumbum command in blue, prefixed with > to indicate it's a shell command.
+    Print a Plumbum command (or executable) in blue, prefixed with > to indicate it's a shell command.
     """
-    info(f"> {command[args]}")
+    if isinstance(command, str):
+        info(f"> {shlex.join([command, *args])}")
+    else:
+        info(f"> {command[args]}")
 
 
 def log_cmd_output(stdout: str = "", stderr: str = "") -> None:
@@ -662,8 +964,12 @@ class ApplicationState:
         """
         existing_config = self.get_config()
 
-        values = convert_config(values)
-        existing_config.update(**values)
+        # every (sub)command of 'all' and 'fix' updates the config with the same values,
+        # so only hand over what actually changed (and skip the update entirely if nothing did):
+        if changed := {
+            key: value for key, value in convert_config(values).items() if getattr(existing_config, key, None) != value
+        }:
+            existing_config.update(**changed)
         return existing_config
 
 
@@ -2,17 +2,18 @@
 Provides a register decorator for third party plugins, and a `include_plugins` (used in cli.py) that loads them.
 """
 
+import functools
 import typing
 from dataclasses import dataclass
-from importlib.metadata import EntryPoint, entry_points
+from importlib.metadata import EntryPoint, EntryPoints, entry_points
 
-from rich import print
 from typer import Typer
 
 from .core import (
     AbstractConfig,
     ApplicationState,
     T_Command,
+    print,
     print_json,
     run_tool,
     state,
@@ -268,6 +269,16 @@ def unbind(meth: BoundMethodOf[typing.Any] | Unbound) -> typing.Optional[Unbound
     return getattr(meth, "__func__", None)
 
 
+@functools.lru_cache(maxsize=1)
+def discover_plugins() -> EntryPoints:
+    """
+    Find the entrypoints in the 'su6' group.
+
+    This scans the metadata of every installed distribution, so the result is cached for `su6 plugins`.
+    """
+    return entry_points(group="su6")
+
+
 @dataclass()
 class PluginLoader:
     app: Typer
@@ -283,8 +294,7 @@ class PluginLoader:
             [project.entry-points."su6"]
             demo = "su6_plugin_demo.cli"  # <- CHANGE ME
         """
-        discovered_plugins = entry_points(group="su6")
-        for plugin in discovered_plugins:  # pragma: nocover
+        for plugin in discover_plugins():  # pragma: nocover
             self._load_plugin(plugin)
 
         self._cleanup()
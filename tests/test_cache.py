@@ -0,0 +1,93 @@
+import os
+
+from configuraptor import Singleton
+
+from src.su6 import cache
+from src.su6.core import ExitCodes, Verbosity, run_tool, state
+
+from .test_core import chdir
+
+
+def test_fingerprint(tmp_path):
+    code = tmp_path / "code.py"
+    code.write_text("print('hello')")
+    (tmp_path / "__pycache__").mkdir()
+
+    before = cache.fingerprint([str(tmp_path), "--not-a-path"])
+    assert before == cache.fingerprint([str(tmp_path)])
+
+    # irrelevant directories are ignored:
+    (tmp_path / "__pycache__" / "code.pyc").write_text("...")
+    assert before == cache.fingerprint([str(tmp_path)])
+
+    # reports written by pytest and skipped paths (e.g. the cache dir) are ignored too:
+    (tmp_path / "coverage.json").write_text("{}")
+    (tmp_path / ".coverage").write_text("")
+    (tmp_path / ".coverage.host.123").write_text("")
+    (tmp_path / "su6_cache").mkdir()
+    (tmp_path / "su6_cache" / "results.json").write_text("{}")
+    assert before == cache.fingerprint([str(tmp_path)], skip=[str(tmp_path / "su6_cache")])
+
+    # nested packages are included:
+    (tmp_path / "package").mkdir()
+    (tmp_path / "package" / "__init__.py").write_text("")
+    nested = cache.fingerprint([str(tmp_path)], skip=[str(tmp_path / "su6_cache")])
+    assert nested != before
+
+    code.write_text("print('changed')")
+    assert nested != cache.fingerprint([str(tmp_path)], skip=[str(tmp_path / "su6_cache")])
+    assert cache.fingerprint([str(code)]) != cache.fingerprint([str(tmp_path / "other.py")])
+
+
+def test_load_save_cache(tmp_path):
+    assert cache.load_cache(tmp_path / "missing") == {}
+
+    cache.remember_success(tmp_path, "key", "value")
+    assert cache.is_unchanged(tmp_path, "key", "value")
+    assert not cache.is_unchanged(tmp_path, "key", "other")
+    assert not cache.is_unchanged(tmp_path, "other", "value")
+
+    (tmp_path / cache.CACHE_FILE).write_text("{corrupt")
+    assert cache.load_cache(tmp_path) == {}
+
+
+def test_run_tool_cached(tmp_path, capsys):
+    (tmp_path / "pyproject.toml").write_text("[tool.su6]\n")
+    (tmp_path / "src").mkdir()
+    code = tmp_path / "src" / "code.py"
+    code.write_text("print('hello')")
+
+    try:
+        # run from a subdirectory, with the pyproject.toml of the project root:
+        with chdir(tmp_path / "src"):
+            Singleton.clear(state.config)
+            # a cache dir inside the checked directory (not hidden, so not skipped by name):
+            state.load_config(verbosity=Verbosity.verbose, cache=True, cache_dir="su6_cache", badge="coverage.svg")
+            assert state.config.pyproject == str(tmp_path / "pyproject.toml")
+
+            assert run_tool("echo", ".", cacheable=True) == ExitCodes.success
+            assert "> " in capsys.readouterr().err  # command was executed
+
+            # pytest's coverage data (and the badge su6 makes of it) doesn't count as a change:
+            (tmp_path / "src" / ".coverage").write_text("")
+            (tmp_path / "src" / "coverage.svg").write_text("<svg/>")
+            assert run_tool("echo", ".", cacheable=True) == ExitCodes.success
+            assert "skipping" in capsys.readouterr().err
+
+            os.utime(code, ns=(0, 0))
+            assert run_tool("echo", ".", cacheable=True) == ExitCodes.success
+            assert "> " in capsys.readouterr().err  # changed -> executed again
+
+            # the config of a tool (next to pyproject.toml, outside of the checked paths) changed -> executed again:
+            assert run_tool("echo", ".", cacheable=True) == ExitCodes.success
+            assert "skipping" in capsys.readouterr().err
+            (tmp_path / "ruff.toml").write_text("line-length = 120")
+            assert run_tool("echo", ".", cacheable=True) == ExitCodes.success
+            assert "skipping" not in capsys.readouterr().err
+
+            # failures are never cached:
+            assert run_tool("false", str(code), cacheable=True) == ExitCodes.error
+            assert run_tool("false", str(code), cacheable=True) == ExitCodes.error
+    finally:
+        Singleton.clear(state.config)
+        state.load_config(verbosity=Verbosity.normal)
@@ -1,18 +1,30 @@
 import json
 import os
 import shutil
+import subprocess
 
 import pytest
 from typer.testing import CliRunner
 
+from src import su6
 from src.su6.__about__ import __version__
-from src.su6.cli import app, run_tool
-from src.su6.core import GREEN_CIRCLE, RED_CIRCLE, ExitCodes, PlumbumError
+from src.su6.cli import _write_coverage_badge, app, run_tool
+from src.su6.core import (
+    GREEN_CIRCLE,
+    RED_CIRCLE,
+    Config,
+    ExitCodes,
+    PlumbumError,
+    Verbosity,
+    changed_python_files,
+    state,
+)
 
 # by default, click's cli runner mixes stdout and stderr for some reason...
 runner = CliRunner(mix_stderr=False)
 
 from ._shared import BAD_CODE, EXAMPLES_PATH, GOOD_CODE
+from .test_core import chdir
 
 
 def test_ruff_good():
@@ -136,6 +148,96 @@ def test_all_fix():
         os.unlink(fixable_code)
 
 
+def test_ruff_unified():
+    config = ["--config", str(EXAMPLES_PATH / "ruff_unified.toml"), "--format", "json"]
+
+    result = runner.invoke(app, [*config, "all", GOOD_CODE])
+    assert result.exit_code == 0
+    assert json.loads(result.stdout) == {"black": True, "isort": True}
+
+    result = runner.invoke(app, [*config, "all", BAD_CODE])
+    assert result.exit_code == 1
+    assert json.loads(result.stdout) == {"black": False, "isort": False}
+
+    # default-flags for black and isort are not passed to ruff:
+    config_with_flags = ["--config", str(EXAMPLES_PATH / "ruff_unified_flags.toml"), "--format", "json"]
+    result = runner.invoke(app, [*config_with_flags, "all", GOOD_CODE])
+    assert result.exit_code == 0
+    assert json.loads(result.stdout) == {"black": True, "isort": True}
+
+    fixable_code = str(EXAMPLES_PATH / "fix_ruff_unified.py")
+    shutil.copyfile(BAD_CODE, fixable_code)
+    try:
+        result = runner.invoke(app, [*config, "fix", fixable_code])
+        assert result.exit_code == 0
+
+        result = runner.invoke(app, [*config, "all", fixable_code])
+        assert result.exit_code == 0
+    finally:
+        os.unlink(fixable_code)
+
+
+def test_changed(tmp_path):
+    with chdir(tmp_path):
+        # not a git repo -> can't tell, so everything is checked
+        assert changed_python_files(".") is None
+        result = runner.invoke(app, ["--verbosity", "3", "ruff", "--changed"])
+        assert "Could not determine changed files via git" in result.stderr
+
+        subprocess.run(["git", "init", "-q"], check=True)
+        git_user = ["-c", "user.name=su6", "-c", "user.email=su6@example.com"]
+        subprocess.run(["git", *git_user, "commit", "-q", "--allow-empty", "-m", "init"], check=True)
+        assert changed_python_files(".") == []
+
+        for tool in ("ruff", "black", "isort"):
+            # nothing changed -> success without running anything
+            assert runner.invoke(app, [tool, "--changed"]).exit_code == 0
+
+        shutil.copyfile(BAD_CODE, "bad.py")
+        shutil.copyfile(GOOD_CODE, "good.py")
+        assert changed_python_files(".") == ["bad.py", "good.py"]
+
+        for tool in ("ruff", "black", "isort"):
+            assert runner.invoke(app, [tool, "--changed"]).exit_code == 1
+
+        ruff_unified = ["--config", str(EXAMPLES_PATH / "ruff_unified.toml")]
+        for tool in ("black", "isort"):
+            assert runner.invoke(app, [*ruff_unified, tool, "--changed"]).exit_code == 1
+
+        os.unlink("bad.py")
+        for tool in ("ruff", "black", "isort"):
+            assert runner.invoke(app, [tool, "--changed"]).exit_code == 0
+        for tool in ("black", "isort"):
+            assert runner.invoke(app, [*ruff_unified, tool, "--changed"]).exit_code == 0
+
+        # a renamed (and edited) file is checked under its new name:
+        subprocess.run(["git", "add", "good.py"], check=True)
+        subprocess.run(["git", *git_user, "commit", "-q", "-m", "good"], check=True)
+        assert changed_python_files(".") == []
+        subprocess.run(["git", "mv", "good.py", "renamed.py"], check=True)
+        with open("renamed.py", "a") as f:
+            f.write("\n")
+        assert changed_python_files(".") == ["renamed.py"]
+
+
+def test_coverage_badge(tmp_path, monkeypatch, capsys):
+    with chdir(tmp_path):
+        with open("coverage.xml", "w") as f:
+            f.write('<coverage branch-rate="0" branches-covered="0" branches-valid="0" complexity="0" line-rate="0.5" ')
+            f.write('lines-covered="5" lines-valid="10" timestamp="1620747625339" version="7.2"></coverage>')
+
+        _write_coverage_badge("badge/coverage.svg")
+
+        with open("badge/coverage.svg") as f:
+            assert "50.00%" in f.read()
+
+        # an existing badge is replaced:
+        monkeypatch.setattr(state, "verbosity", Verbosity.verbose)
+        _write_coverage_badge("badge/coverage.svg")
+        assert os.listdir("badge") == ["coverage.svg"]
+        assert "Coverage badge created: 'badge/coverage.svg'" in capsys.readouterr().err
+
+
 def test_pydocstyle_good():
     result = runner.invoke(app, ["pydocstyle", GOOD_CODE])
     assert result.exit_code == 0
@@ -357,6 +459,12 @@ def test_stop_after_first_failure():
         "ruff": False,
     }
 
+    # fix (isort fails on a missing file, so black is skipped)
+    args = ["--format", "json", "fix", str(EXAMPLES_PATH / "missing.py"), "--stop-after-first-failure"]
+    result = runner.invoke(app, args)
+    assert result.exit_code == 1
+    assert json.loads(result.stdout) == {"isort": False}
+
 
 def test_show_config_callback():
     # text
@@ -398,3 +506,40 @@ def test_list():
 
     assert results["ruff"] is True
     assert results["pytest"] is False
+
+
+def test_lazy_app():
+    assert su6.app is app
+
+    with pytest.raises(AttributeError):
+        su6.not_an_attribute
+
+
+def test_tool_cache_dir(tmp_path):
+    assert Config().get_tool_cache_dir("mypy") is None
+
+    result = runner.invoke(app, ["--cache-dir", str(tmp_path), "mypy", GOOD_CODE])
+    assert result.exit_code == 0
+    # mypy's own incremental cache is stored in the su6 cache dir:
+    assert any((tmp_path / "mypy").iterdir())
+
+
+def test_dmypy(tmp_path, monkeypatch):
+    config = ["--config", str(EXAMPLES_PATH / "dmypy.toml"), "--cache-dir", str(tmp_path), "--format", "json"]
+    try:
+        result = runner.invoke(app, [*config, "mypy", GOOD_CODE])
+        assert result.exit_code == 0
+        assert json.loads(result.stdout) == {"mypy": True}
+        # the daemon's status file is kept with the other caches:
+        assert (tmp_path / "mypy" / "dmypy.json").exists()
+
+        result = runner.invoke(app, [*config, "mypy", BAD_CODE])
+        assert result.exit_code == 1
+    finally:
+        subprocess.run(["dmypy", "--status-file", str(tmp_path / "mypy" / "dmypy.json"), "stop"])
+
+    # without dmypy, plain mypy is used:
+    monkeypatch.setattr("src.su6.cli.is_installed", lambda *_, **__: False)
+    result = runner.invoke(app, [*config, "mypy", GOOD_CODE])
+    assert result.exit_code == 0
+    assert not (tmp_path / "mypy" / "dmypy.json").exists()
@@ -1,5 +1,8 @@
 import contextlib
+import shutil
 import sys
+import threading
+import time
 from dataclasses import dataclass
 
 import pytest
@@ -10,14 +13,22 @@ from src.su6.core import (
     ApplicationState,
     Config,
     ExitCodes,
+    PlumbumError,
     Verbosity,
     _get_su6_config,
+    _parse_toml,
+    _spawn,
     get_su6_config,
     is_available_via_python,
     is_installed,
+    load_toml,
+    log_cmd_output,
     on_tool_failure,
     on_tool_missing,
     on_tool_success,
+    print,
+    run_in_parallel,
+    run_until_first_failure,
     run_tool,
     state, run_tool_via_python,
 )
@@ -63,6 +74,11 @@ def test_verbosity_compare():
     with pytest.raises(TypeError):
         assert verbosity_3 == []
 
+    # other types are not coerced:
+    assert verbosity_3.__gt__(2.5) is NotImplemented
+    with pytest.raises(TypeError):
+        assert verbosity_3 > None
+
 
 def test_get_su6_config():
     # doesnt_exist - defaults
@@ -130,6 +146,15 @@ def test_get_default_flags(capsys):
     Singleton.clear(state.config)
 
 
+def test_spawn_without_capture():
+    assert _spawn(shutil.which("echo"), ["hi"]) == "hi\n"
+    assert _spawn(shutil.which("echo"), ["hi"], capture=False) == ""
+
+    with pytest.raises(PlumbumError) as e:
+        _spawn(shutil.which("ls"), ["/fake-news-xyz"], capture=False)
+    assert e.value.retcode and e.value.stderr == ""
+
+
 def test_is_installed():
     assert is_installed("su6")
     assert not is_installed("some-fake-package")
@@ -146,6 +171,7 @@ def test_is_available_via_python():
     assert not is_installed("__hello__", python_fallback=False)
     assert is_installed("__hello__", python_fallback=True)
     assert is_available_via_python("__hello__")
+    assert not is_available_via_python("__hello_missing__.module")
 
 
 @dataclass
@@ -162,3 +188,91 @@ def test_on_tool_callbacks():
     assert on_tool_success("-", "") == ExitCodes.success
     assert on_tool_missing("-") == ExitCodes.command_not_found
     assert on_tool_failure("-", DummyError()) == ExitCodes.error
+
+
+def test_run_in_parallel(capsys):
+    def slow_first():
+        time.sleep(0.2)
+        print("first")
+        return 1
+
+    def fast_second():
+        print("second")
+        return 2
+
+    assert run_in_parallel([slow_first, fast_second]) == [1, 2]
+    assert run_in_parallel([]) == []
+
+    captured = capsys.readouterr()
+    # output is flushed in order of the calls, not in order of completion:
+    assert captured.out.index("first") < captured.out.index("second")
+
+    # a single call runs in the current thread (but still in its own context):
+    assert run_in_parallel([threading.current_thread]) == [threading.current_thread()]
+    assert run_in_parallel([fast_second]) == [2]
+    assert capsys.readouterr().out.split() == ["second"]
+
+
+def test_run_until_first_failure(capsys):
+    def make(name, result):
+        def call():
+            print(name)
+            return result
+
+        return call
+
+    a_ok, b_fails, c_ok = make("a", 0), make("b", 1), make("c", 0)
+
+    # b (stage 0) fails, but a (stage 1) comes first in order so it still has to run:
+    assert run_until_first_failure([a_ok, b_fails, c_ok], [1, 0, 0]) == [0, 1]
+    assert capsys.readouterr().out.split() == ["a", "b"]  # c ran, but is dropped
+
+    # a (stage 0) fails -> stage 1 never starts:
+    assert run_until_first_failure([b_fails, a_ok], [0, 1]) == [1]
+    assert capsys.readouterr().out.split() == ["b"]
+
+    assert run_until_first_failure([a_ok, c_ok], [1, 0]) == [0, 0]
+    assert capsys.readouterr().out.split() == ["a", "c"]
+
+
+def test_run_until_first_failure_cancels(monkeypatch):
+    started = []
+
+    def make(name, result, duration=0.0):
+        def call():
+            started.append(name)
+            time.sleep(duration)
+            return result
+
+        return call
+
+    # one worker: 'slow' is picked up after 'fails', 'queued' is cancelled before it can start
+    monkeypatch.setattr("os.cpu_count", lambda: 1)
+    calls = [make("fails", 1), make("slow", 0, 0.2), make("queued", 0)]
+    assert run_until_first_failure(calls, [0, 0, 0]) == [1]
+    assert "queued" not in started
+
+
+def test_load_toml(tmp_path):
+    toml_file = tmp_path / "pyproject.toml"
+    toml_file.write_text("[tool.su6]\ndirectory = 'src'\n")
+
+    data = load_toml(toml_file)
+    assert data == {"tool": {"su6": {"directory": "src"}}}
+    data["tool"]["su6"]["directory"] = "changed"
+
+    hits = _parse_toml.cache_info().hits
+    # cached (and the change above didn't leak into the cache):
+    assert load_toml(toml_file) == {"tool": {"su6": {"directory": "src"}}}
+    assert _parse_toml.cache_info().hits == hits + 1
+
+    # edited file (different size) is parsed again:
+    toml_file.write_text("[tool.su6]\ndirectory = 'other'\n")
+    assert load_toml(toml_file) == {"tool": {"su6": {"directory": "other"}}}
+
+
+def test_log_output_is_not_markup(capsys):
+    log_cmd_output("file.py:1: error: something  [attr-defined]", "[red]not a style[/red]")
+    captured = capsys.readouterr()
+    assert "[attr-defined]" in captured.err
+    assert "[red]not a style[/red]" in captured.err